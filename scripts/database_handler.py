@@ -1,13 +1,29 @@
 import sqlite3
 import os
-from datetime import datetime
+import csv
+import gzip
+from datetime import datetime, timedelta
 
 DB_PATH = "database/predictions.db"
+ARCHIVE_DIR = "database/archive"
+
+# Valor de PRAGMA auto_vacuum para el modo incremental
+AUTO_VACUUM_INCREMENTAL = 2
 
 def create_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+
+    # auto_vacuum incremental permite liberar espacio por partes sin bloquear la base.
+    # En una base ya existente solo se aplica tras un VACUUM completo (una única vez).
+    c.execute("PRAGMA auto_vacuum")
+    if c.fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        c.execute("VACUUM")
+    # WAL deja que la GUI siga leyendo mientras se archivan resultados
+    c.execute("PRAGMA journal_mode = WAL")
+
     c.execute('''
         CREATE TABLE IF NOT EXISTS paciente (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -24,10 +40,19 @@ def create_db():
             imagen TEXT,
             clase_predicha TEXT,
             probabilidad REAL,
+            fecha TEXT DEFAULT (datetime('now', 'localtime')),
             FOREIGN KEY(paciente_id) REFERENCES paciente(id)
         )
     ''')
 
+    # Migración de bases anteriores sin columna 'fecha': las filas existentes
+    # toman la fecha de la migración para que la retención no las borre de inmediato
+    c.execute("PRAGMA table_info(resultado)")
+    if "fecha" not in [col[1] for col in c.fetchall()]:
+        c.execute("ALTER TABLE resultado ADD COLUMN fecha TEXT")
+        c.execute("UPDATE resultado SET fecha = datetime('now', 'localtime')")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_resultado_fecha ON resultado(fecha)")
+
     conn.commit()
     conn.close()
 
@@ -43,8 +68,9 @@ def insert_paciente(nombre, edad, genero):
 def insert_resultado(paciente_id, imagen, clase_predicha, probabilidad):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("INSERT INTO resultado (paciente_id, imagen, clase_predicha, probabilidad) VALUES (?, ?, ?, ?)",
-              (paciente_id, imagen, clase_predicha, probabilidad))
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute("INSERT INTO resultado (paciente_id, imagen, clase_predicha, probabilidad, fecha) VALUES (?, ?, ?, ?, ?)",
+              (paciente_id, imagen, clase_predicha, probabilidad, fecha))
     conn.commit()
     conn.close()
 
@@ -73,7 +99,7 @@ def get_all_data_for_export():
     SELECT 
         p.id, p.nombre, p.edad, p.genero, 
         r.imagen, r.clase_predicha, r.probabilidad,
-        datetime(r.id, 'unixepoch') as fecha
+        r.fecha
     FROM paciente p
     LEFT JOIN resultado r ON p.id = r.paciente_id
     ORDER BY p.id
@@ -101,6 +127,92 @@ def delete_all_data():
     # Eliminar primero de 'resultado' por la clave foránea a 'paciente'
     c.execute("DELETE FROM resultado")
     c.execute("DELETE FROM paciente")
-    
+
     conn.commit()
     conn.close()
+
+    incremental_vacuum()
+
+def archive_old_resultados(days, archive_dir=ARCHIVE_DIR, batch_size=500):
+    """Mueve los resultados con más de 'days' días a un CSV comprimido (gzip).
+    Los pacientes que se quedan sin resultados también se eliminan de la base.
+
+    Trabaja por lotes: cada lote se escribe en el archivo y se borra de la base
+    en su propia transacción, así la GUI no queda bloqueada mucho tiempo.
+    Devuelve (filas archivadas, ruta del archivo o None si no había nada que archivar).
+    """
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    # Microsegundos en el nombre para no pisar un archivo de otra ejecución
+    archive_path = os.path.join(
+        archive_dir, f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.csv.gz")
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    total = 0
+    f = None
+    try:
+        while True:
+            # Se incluyen los datos del paciente para que el archivo no dependa de la base
+            c.execute("""
+                SELECT
+                    r.id, r.paciente_id, p.nombre, p.edad, p.genero,
+                    r.imagen, r.clase_predicha, r.probabilidad, r.fecha
+                FROM resultado r
+                LEFT JOIN paciente p ON p.id = r.paciente_id
+                WHERE r.fecha < ?
+                ORDER BY r.fecha
+                LIMIT ?
+            """, (cutoff, batch_size))
+            rows = c.fetchall()
+            if not rows:
+                break
+
+            if f is None:
+                os.makedirs(archive_dir, exist_ok=True)
+                # 'xt' falla si el archivo ya existe en lugar de sobrescribirlo
+                f = gzip.open(archive_path, 'xt', newline='', encoding='utf-8')
+                writer = csv.writer(f)
+                writer.writerow(['ID_Paciente', 'Nombre', 'Edad', 'Género',
+                                 'Imagen', 'Clase_Predicha', 'Probabilidad', 'Fecha'])
+            writer.writerows(row[1:] for row in rows)
+            f.flush()
+
+            # Borrar solo después de que el lote esté escrito en el archivo
+            c.executemany("DELETE FROM resultado WHERE id=?", [(row[0],) for row in rows])
+            # Los pacientes del lote que se quedan sin resultados ya están en el archivo
+            c.executemany("""
+                DELETE FROM paciente
+                WHERE id=? AND NOT EXISTS (SELECT 1 FROM resultado WHERE paciente_id=paciente.id)
+            """, [(paciente_id,) for paciente_id in {row[1] for row in rows}])
+            conn.commit()
+            total += len(rows)
+    finally:
+        if f is not None:
+            f.close()
+        conn.close()
+
+    if total:
+        incremental_vacuum()
+    return total, (archive_path if total else None)
+
+def incremental_vacuum(chunk_pages=1000):
+    """Devuelve al sistema todas las páginas libres de la base.
+
+    Libera 'chunk_pages' páginas por transacción para que cada bloqueo sea corto.
+    Devuelve el número de páginas liberadas.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    freed = 0
+    while True:
+        c.execute("PRAGMA freelist_count")
+        free_pages = c.fetchone()[0]
+        if not free_pages:
+            break
+        # executescript ejecuta el pragma hasta el final; execute() solo liberaría una página
+        conn.executescript(f"PRAGMA incremental_vacuum({int(chunk_pages)});")
+        freed += min(free_pages, chunk_pages)
+    # Pasar el WAL a la base para que el archivo realmente se reduzca
+    c.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return freed
@@ -6,7 +6,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 from database_handler import create_db, insert_paciente, get_pacientes, insert_resultado, get_resultados, get_all_data_for_export
-from predict import load_model, predict_single_image
+from predict import load_model, predict_single_image, CascadeClassifier
 import os
 import random
 import csv
@@ -14,7 +14,7 @@ from datetime import datetime
 
 
 class MainWindow(QWidget):
-    def __init__(self, model_path, zip_path, class_names):
+    def __init__(self, model_path, zip_path, class_names, cascade_path=None):
         super().__init__()
         self.setWindowTitle("Clasificador COVID - Hospital")
         self.resize(900, 600)
@@ -22,6 +22,13 @@ class MainWindow(QWidget):
         self.zip_path = zip_path
         self.class_names = class_names
         self.model = load_model(model_path)
+        # Cascada opcional: solo si se pidió explícitamente, existe el modelo
+        # rápido y la calibración habilitó la etapa rápida
+        self.cascade = None
+        if cascade_path and os.path.exists(cascade_path):
+            cascade = CascadeClassifier(self.model, cascade_path)
+            if cascade.enabled:
+                self.cascade = cascade
 
         create_db()
         self.paciente_id = None
@@ -97,14 +104,23 @@ class MainWindow(QWidget):
 
         try:
             paciente_id = insert_paciente(nombre.strip(), edad, genero)
-            clase, prob_array = predict_single_image(self.model, image_path=image_path, image_in_zip=None, class_names=self.class_names)
+            if self.cascade:
+                clase, prob_array = self.cascade.predict(image_path, self.class_names)
+            else:
+                clase, prob_array = predict_single_image(self.model, image_path=image_path, image_in_zip=None, class_names=self.class_names)
             prob = max(prob_array)
             insert_resultado(paciente_id, os.path.basename(image_path), clase, prob)
 
             self.paciente_id = paciente_id
             self.load_pacientes()
             self.load_resultados()
-            QMessageBox.information(self, "Éxito", f"Paciente {nombre} agregado.\nImagen: {os.path.basename(image_path)}")
+            mensaje = f"Paciente {nombre} agregado.\nImagen: {os.path.basename(image_path)}"
+            if self.cascade:
+                stats = self.cascade.stats()
+                mensaje += (f"\n\nCascada: {stats['fast_fraction']:.0%} de {stats['total']} imágenes "
+                            f"resueltas por la etapa rápida, latencia media {stats['mean_latency_ms']:.1f} ms "
+                            f"(sin lectura de la imagen)")
+            QMessageBox.information(self, "Éxito", mensaje)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo procesar la imagen: {str(e)}")
 
@@ -35,34 +35,43 @@
 #     pred_prob = model.predict_proba(features)[0]
 #     return class_names[pred_idx], pred_prob
 
+import time
 import numpy as np
 import cv2
 from skimage.feature import hog, local_binary_pattern
 import joblib
 
+LBP_RADIUS = 3
+LBP_POINTS = 8 * LBP_RADIUS
+# Las últimas LBP_BINS columnas del vector de características son el histograma LBP
+LBP_BINS = LBP_POINTS + 2
+
 def load_model(model_path):
     return joblib.load(model_path)
 
-def preprocess_image_from_path(image_path):
+def load_image(image_path):
     img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
     if img is None:
         raise ValueError(f"No se pudo leer la imagen: {image_path}")
-    
+
     img = cv2.resize(img, (150, 150))
     img = cv2.equalizeHist(img)
-    img = img / 255.0
+    return img / 255.0
 
-    hog_feat = hog(img, orientations=8, pixels_per_cell=(16, 16),
-                   cells_per_block=(1, 1), feature_vector=True)
-
-    radius = 3
-    n_points = 8 * radius
-    lbp = local_binary_pattern(img, n_points, radius, method='uniform')
-    lbp_hist, _ = np.histogram(lbp, bins=n_points+2, range=(0, n_points+2))
+def lbp_histogram(img):
+    lbp = local_binary_pattern(img, LBP_POINTS, LBP_RADIUS, method='uniform')
+    lbp_hist, _ = np.histogram(lbp, bins=LBP_BINS, range=(0, LBP_BINS))
     lbp_hist = lbp_hist.astype("float")
     lbp_hist /= (lbp_hist.sum() + 1e-6)
+    return lbp_hist
+
+def hog_features(img):
+    return hog(img, orientations=8, pixels_per_cell=(16, 16),
+               cells_per_block=(1, 1), feature_vector=True)
 
-    return np.hstack([hog_feat, lbp_hist])
+def preprocess_image_from_path(image_path):
+    img = load_image(image_path)
+    return np.hstack([hog_features(img), lbp_histogram(img)])
 
 def predict_single_image(model, image_path=None, image_in_zip=None, class_names=None):
     if image_path:
@@ -73,3 +82,49 @@ def predict_single_image(model, image_path=None, image_in_zip=None, class_names=
     pred_idx = model.predict(features)[0]
     pred_prob = model.predict_proba(features)[0]
     return class_names[pred_idx], pred_prob
+
+class CascadeClassifier:
+    """Clasificador en dos etapas: modelo rápido sobre el histograma LBP y,
+    solo si su confianza no alcanza el umbral, HOG + Random Forest completo."""
+
+    def __init__(self, model, cascade_path):
+        cascade = joblib.load(cascade_path)
+        self.model = model
+        self.fast_model = cascade['model']
+        self.threshold = cascade['threshold']
+        # Un umbral mayor que 1 significa que la calibración deshabilitó la etapa rápida
+        self.enabled = self.threshold <= 1
+        self.total = 0
+        self.fast_count = 0
+        self.total_time = 0.0
+
+    def predict(self, image_path, class_names):
+        img = load_image(image_path)
+        # Igual que en el reporte de entrenamiento: sin contar la lectura de la imagen
+        start = time.perf_counter()
+        lbp_hist = lbp_histogram(img)
+
+        classifier = self.fast_model
+        pred_prob = classifier.predict_proba(lbp_hist.reshape(1, -1))[0]
+        fast = pred_prob.max() >= self.threshold
+        if not fast:
+            classifier = self.model
+            features = np.hstack([hog_features(img), lbp_hist]).reshape(1, -1)
+            pred_prob = classifier.predict_proba(features)[0]
+
+        self.total += 1
+        self.fast_count += int(fast)
+        self.total_time += time.perf_counter() - start
+        pred_idx = classifier.classes_[np.argmax(pred_prob)]
+        return class_names[pred_idx], pred_prob
+
+    def stats(self):
+        """Fracción de imágenes resueltas por la etapa rápida y latencia media (ms),
+        sin contar la lectura de la imagen"""
+        if not self.total:
+            return {'total': 0, 'fast_fraction': 0.0, 'mean_latency_ms': 0.0}
+        return {
+            'total': self.total,
+            'fast_fraction': self.fast_count / self.total,
+            'mean_latency_ms': 1000 * self.total_time / self.total,
+        }
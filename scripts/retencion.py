@@ -0,0 +1,15 @@
+# retencion.py
+import sys
+from database_handler import create_db, archive_old_resultados
+
+# Días que se conservan los resultados antes de archivarlos
+DEFAULT_DAYS = 90
+
+days = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DAYS
+
+create_db()
+total, archive_path = archive_old_resultados(days)
+if total:
+    print(f"Se archivaron {total} resultados con más de {days} días en: {archive_path}")
+else:
+    print(f"No hay resultados con más de {days} días para archivar.")
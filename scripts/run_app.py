@@ -3,13 +3,17 @@ from main import MainWindow
 import joblib
 import sys
 
+# Cascada LBP + modelo completo; desactivada salvo que se habilite aquí
+USE_CASCADE = False
+
 if __name__ == "__main__":
     zip_path = "data/Dataset_COVID.zip"
     model_path = "models/covid_classifier.joblib"
+    cascade_path = "models/cascade_fast.joblib" if USE_CASCADE else None
     metadata = joblib.load("data/processed/metadata.joblib")
     class_names = metadata['class_names']
 
     app = QApplication(sys.argv)
-    window = MainWindow(model_path, zip_path, class_names)
+    window = MainWindow(model_path, zip_path, class_names, cascade_path)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
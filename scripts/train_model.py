@@ -2,6 +2,7 @@ import os
 import time
 import psutil
 import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
@@ -9,10 +10,89 @@ from imblearn.over_sampling import SMOTE
 import matplotlib.pyplot as plt
 import seaborn as sns
 from utils import load_metadata
+from predict import LBP_BINS, lbp_histogram, hog_features
+
+# Umbral que desactiva la etapa rápida (la confianza nunca supera 1)
+DISABLED_THRESHOLD = 1.01
+
+def calibrate_threshold(confidences, correct, target_accuracy, min_accepted=20):
+    """Menor umbral de confianza con el que las respuestas aceptadas por la
+    etapa rápida alcanzan 'target_accuracy' sobre al menos 'min_accepted'
+    muestras. Si ninguno lo logra (o la calibración tiene muy pocas muestras),
+    devuelve DISABLED_THRESHOLD para que todo pase por el modelo completo."""
+    for threshold in np.unique(confidences):
+        accepted = confidences >= threshold
+        if accepted.sum() < min_accepted:
+            break
+        if correct[accepted].mean() >= target_accuracy:
+            return float(threshold)
+    return DISABLED_THRESHOLD
+
+def time_per_call(func, *args, repeats):
+    """Tiempo medio (s) de una llamada a func(*args)"""
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - start_time) / repeats
+
+def train_cascade(X_train, y_train, X_test, y_test, model, target_accuracy=0.95):
+    """Entrena el modelo rápido sobre el histograma LBP y calibra su umbral"""
+    X_fit, X_cal, y_fit, y_cal = train_test_split(
+        X_train[:, -LBP_BINS:], y_train, test_size=0.2, stratify=y_train, random_state=42)
+
+    # Sin SMOTE: el conjunto es pequeño y class_weight ya compensa el desbalance
+    fast_model = RandomForestClassifier(
+        n_estimators=30,
+        max_depth=8,
+        n_jobs=1,
+        random_state=42,
+        class_weight='balanced'
+    )
+    fast_model.fit(X_fit, y_fit)
+
+    cal_prob = fast_model.predict_proba(X_cal)
+    cal_pred = fast_model.classes_[cal_prob.argmax(axis=1)]
+    threshold = calibrate_threshold(cal_prob.max(axis=1), cal_pred == y_cal, target_accuracy)
+
+    # Sin la salida de progreso de joblib en medio del reporte de la cascada
+    verbose = model.verbose
+    model.set_params(verbose=0)
+
+    # Evaluación de la cascada completa sobre el conjunto de prueba
+    test_prob = fast_model.predict_proba(X_test[:, -LBP_BINS:])
+    full_pred = model.predict(X_test)
+    fast_mask = test_prob.max(axis=1) >= threshold
+    y_pred = np.where(fast_mask, fast_model.classes_[test_prob.argmax(axis=1)], full_pred)
+    fast_fraction = fast_mask.mean()
+
+    # Latencia por imagen: las imágenes originales no están en los metadatos, así que
+    # el coste de LBP y HOG se mide sobre una imagen sintética del mismo tamaño (150x150)
+    sample_img = np.random.default_rng(42).random((150, 150))
+    lbp_time = time_per_call(lbp_histogram, sample_img, repeats=len(X_test))
+    hog_time = time_per_call(hog_features, sample_img, repeats=len(X_test))
+
+    cascade_times, full_times = [], []
+    for i, use_fast in enumerate(fast_mask):
+        fast_time = time_per_call(fast_model.predict_proba, X_test[i:i + 1, -LBP_BINS:], repeats=1)
+        full_time = time_per_call(model.predict_proba, X_test[i:i + 1], repeats=1)
+        full_times.append(lbp_time + hog_time + full_time)
+        cascade_times.append(lbp_time + fast_time + (0 if use_fast else hog_time + full_time))
+    model.set_params(verbose=verbose)
+
+    return {
+        'model': fast_model,
+        'threshold': threshold,
+        'target_accuracy': target_accuracy,
+        'fast_fraction': float(fast_fraction),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'mean_latency_ms': 1000 * float(np.mean(cascade_times)),
+        'full_latency_ms': 1000 * float(np.mean(full_times)),
+    }
 
 def train_model(features, labels, class_names):
     X_train, X_test, y_train, y_test = train_test_split(
         features, labels, test_size=0.2, stratify=labels, random_state=42)
+    X_train_raw, y_train_raw = X_train, y_train
 
     print("\nBalanceando clases con SMOTE...")
     smote = SMOTE(random_state=42)
@@ -58,26 +138,51 @@ def train_model(features, labels, class_names):
     print("\nReporte de Clasificación:")
     print(report)
 
-    return model, accuracy, report
+    print("\nEntrenando cascada (LBP rápido + modelo completo)...")
+    cascade = train_cascade(X_train_raw, y_train_raw, X_test, y_test, model)
+    print(f"Umbral de confianza: {cascade['threshold']:.4f}")
+    print(f"Fracción resuelta por la etapa rápida: {cascade['fast_fraction']:.2%}")
+    print(f"Accuracy cascada: {cascade['accuracy']:.4f}")
+    print(f"Latencia media por imagen (sin lectura de la imagen): {cascade['mean_latency_ms']:.3f} ms "
+          f"(solo modelo completo: {cascade['full_latency_ms']:.3f} ms)")
+
+    return model, accuracy, report, cascade
 
 def train_and_save_model(metadata_path, model_dir="models"):
     metadata = load_metadata(metadata_path)
     features, labels = metadata['features'], metadata['labels']
     class_names = metadata['class_names']
 
-    model, accuracy, report = train_model(features, labels, class_names)
+    model, accuracy, report, cascade = train_model(features, labels, class_names)
 
     os.makedirs(model_dir, exist_ok=True)
     model_path = os.path.join(model_dir, "covid_classifier.joblib")
     joblib.dump(model, model_path)
+    # Solo se guarda la cascada si la calibración habilitó la etapa rápida;
+    # un archivo de un entrenamiento anterior se elimina para no usarlo por error
+    cascade_path = os.path.join(model_dir, "cascade_fast.joblib")
+    if cascade['threshold'] <= 1:
+        joblib.dump(cascade, cascade_path)
+    elif os.path.exists(cascade_path):
+        os.remove(cascade_path)
 
     report_path = os.path.join("reports", "training_report.txt")
     with open(report_path, 'w') as f:
         f.write(f"Accuracy: {accuracy:.4f}\n\n")
         f.write("Classification Report:\n")
         f.write(report)
+        f.write("\nCascada (LBP rápido + modelo completo):\n")
+        f.write(f"Umbral de confianza: {cascade['threshold']:.4f}\n")
+        f.write(f"Fracción resuelta por la etapa rápida: {cascade['fast_fraction']:.2%}\n")
+        f.write(f"Accuracy cascada: {cascade['accuracy']:.4f}\n")
+        f.write(f"Latencia media por imagen (sin lectura de la imagen): {cascade['mean_latency_ms']:.3f} ms "
+                f"(solo modelo completo: {cascade['full_latency_ms']:.3f} ms)\n")
 
     print(f"\nModelo guardado en: {model_path}")
+    if cascade['threshold'] <= 1:
+        print(f"Cascada guardada en: {cascade_path}")
+    else:
+        print("Cascada no guardada: la calibración no habilitó la etapa rápida")
     print(f"Reporte guardado en: {report_path}")
     return model_path
 
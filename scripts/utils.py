@@ -1,11 +1,11 @@
 import zipfile
 import cv2
 import numpy as np
-from skimage.feature import hog, local_binary_pattern
 import joblib
 import psutil
 from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
+from predict import hog_features, lbp_histogram
 
 class ZipDatasetProcessor:
     def __init__(self, zip_path):
@@ -39,17 +39,8 @@ class ZipDatasetProcessor:
                     img = cv2.equalizeHist(img)
                     img = img / 255.0
 
-                    hog_feat = hog(img, orientations=8, pixels_per_cell=(16, 16),
-                                   cells_per_block=(1, 1), feature_vector=True)
-
-                    radius = 3
-                    n_points = 8 * radius
-                    lbp = local_binary_pattern(img, n_points, radius, method='uniform')
-                    lbp_hist, _ = np.histogram(lbp, bins=n_points+2, range=(0, n_points+2))
-                    lbp_hist = lbp_hist.astype("float")
-                    lbp_hist /= (lbp_hist.sum() + 1e-6)
-
-                    return (np.hstack([hog_feat, lbp_hist]), class_map[cls])
+                    # Mismo orden que preprocess_image_from_path: HOG y luego LBP
+                    return (np.hstack([hog_features(img), lbp_histogram(img)]), class_map[cls])
         except Exception as e:
             print(f"Error procesando {img_path}: {e}")
             return None